@@ -1,2 +1,6 @@
 from .atsChecker import *
-from .atsCheckerApi import *
\ No newline at end of file
+from .atsCheckerApi import *
+from .http import *
+from .llm_cache import *
+from .pdf_pool import *
+from .resume_cache import *
\ No newline at end of file
@@ -1,33 +1,63 @@
 import os
+import re
+import uuid
+import hashlib
 import httpx
-from io import BytesIO
+import orjson
+import aiofiles
+import tiktoken
+from functools import lru_cache
+from typing import Final
 from fastapi import UploadFile, HTTPException
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database.db import retry_with_backoff_async
 from database.dbModels import Resume
+from database.dbQuerry import get_resume_by_hash
+from sqlalchemy.exc import IntegrityError
+from app.atsChecker.http import GROQ_API_KEY, GROQ_API_URL, get_http_client
+from app.atsChecker.pdf_pool import extract_pdf_text_async
+from app.atsChecker.llm_cache import LLMCache, llm_cache, semantic_cache
+from app.atsChecker.resume_cache import invalidate_resume
 from dotenv import load_dotenv
-from PyPDF2 import PdfReader
 
 load_dotenv()
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+RESUME_MAX_TOKENS = int(os.getenv("RESUME_MAX_TOKENS", 6000))
+WHITESPACE_RE = re.compile(r"\s+")
+
+# Kept static (no per-request formatting) so every request shares a byte-identical
+# prefix that the provider can serve from its prompt cache.
+SYSTEM_PROMPT: Final[str] = """You are an expert ATS (Applicant Tracking System) analyzer. Your task is to:
+1. Analyze the given resume
+2. Provide a score from 0-100
+3. Give brief feedback
+4. List specific improvements
+5. Add predicted job fit based on the resume with percentage of getting selected
+Format your response exactly as a JSON object:
+{
+    "ats_score": <number between 0-100>,
+    "feedback": "<single sentence summary>",
+    "improvements": ["point 1", "point 2", "point 3"],
+    "job_fit": {
+        "job_title": "<most suitable job title>",
+        "fit_percentage": <number between 0-100>
+    }
+}"""
+
+SYSTEM_MSG: Final[dict] = {"role": "system", "content": SYSTEM_PROMPT}
+BASE_PAYLOAD: Final[dict] = {
+    "model": "mixtral-8x7b-32768",
+    "temperature": 0.7,
+    "max_tokens": 1000,
+    "response_format": {"type": "json_object"},
+}
+
 
 class ATSFunctions:
     def __init__(self):
-        self.groq_api_url = os.getenv("GROQ_API_URL")
-        self.api_key = os.getenv("GROQ_API_KEY")
-
-    @staticmethod
-    def extract_text_from_pdf(contents: bytes) -> str:
-        try:
-            pdf_file = BytesIO(contents)
-            pdf_reader = PdfReader(pdf_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-            return text
-        except Exception as e:
-            raise HTTPException(
-                status_code=500, detail=f"Error extracting text from PDF: {str(e)}"
-            )
+        self.groq_api_url = GROQ_API_URL
+        self.api_key = GROQ_API_KEY
 
     @staticmethod
     def validate_file_extension(filename: str) -> str:
@@ -40,55 +70,130 @@ class ATSFunctions:
         return file_extension
 
     @staticmethod
-    def save_file(contents: bytes, filename: str) -> str:
+    async def hash_file(file: UploadFile) -> tuple[str, int]:
+        """Hash the upload in chunks, returning (hex digest, size in bytes)"""
+        digest = hashlib.blake2b(digest_size=16)
+        file_size = 0
+        await file.seek(0)
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            file_size += len(chunk)
+        return digest.hexdigest(), file_size
+
+    @staticmethod
+    async def save_file(file: UploadFile, file_hash: str, file_extension: str) -> str:
         temp_dir = "uploads"
         os.makedirs(temp_dir, exist_ok=True)
-        file_path = os.path.join(temp_dir, filename)
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        # Content-addressed names make repeat uploads of the same file a no-op
+        file_path = os.path.join(temp_dir, f"{file_hash}.{file_extension}")
+        if os.path.exists(file_path):
+            return file_path
+        # Write under a unique temp name and rename into place, so an interrupted
+        # write or a concurrent upload never leaves a partial file at file_path
+        temp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            await file.seek(0)
+            async with aiofiles.open(temp_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
         return file_path
 
     @staticmethod
-    def save_resume_to_db(
-        session: Session, filename: str, file_size: int, file_url: str
+    async def save_resume_to_db(
+        session: AsyncSession,
+        filename: str,
+        file_size: int,
+        file_url: str,
+        file_hash: str,
     ) -> Resume:
         try:
-            resume = Resume(filename=filename, file_size=file_size, file_url=file_url)
+            resume = Resume(
+                filename=filename,
+                file_size=file_size,
+                file_url=file_url,
+                file_hash=file_hash,
+            )
             session.add(resume)
-            session.commit()
-            session.refresh(resume)
+            await session.commit()
+            await session.refresh(resume)
+            # The row is visible from here on, even if scoring fails later
+            invalidate_resume(resume.id)
             return resume
+        except IntegrityError as db_error:
+            # A concurrent upload of the same file inserted the row first
+            await session.rollback()
+            resume = await get_resume_by_hash(session, file_hash)
+            if resume is None:
+                raise HTTPException(
+                    status_code=500, detail=f"Database error: {str(db_error)}"
+                )
+            return resume
+        except Exception as db_error:
+            await session.rollback()
+            raise HTTPException(
+                status_code=500, detail=f"Database error: {str(db_error)}"
+            )
+
+    @staticmethod
+    async def save_ats_score(session: AsyncSession, resume: Resume, ats_score: dict):
+        try:
+            resume.ats_score_json = orjson.dumps(ats_score).decode()
+            session.add(resume)
+            await session.commit()
+            invalidate_resume(resume.id)
         except Exception as db_error:
-            session.rollback()
+            await session.rollback()
             raise HTTPException(
                 status_code=500, detail=f"Database error: {str(db_error)}"
             )
 
     @staticmethod
-    async def extract_text_from_file(contents: bytes, file_extension: str) -> str:
+    async def extract_text_from_file(file: UploadFile, file_extension: str) -> str:
         if file_extension == "pdf":
-            return ATSFunctions.extract_text_from_pdf(contents)
+            # The parser needs the whole document; the bytes are dropped on return
+            await file.seek(0)
+            contents = await file.read()
+            try:
+                return await extract_pdf_text_async(contents)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=500, detail=f"Error extracting text from PDF: {str(e)}"
+                )
         else:
             raise HTTPException(
                 status_code=400, detail="Only PDF files are currently supported"
             )
 
     @staticmethod
-    async def upload_resume(file: UploadFile, session: Session):
+    async def upload_resume(file: UploadFile, session: AsyncSession):
         try:
             file_extension = ATSFunctions.validate_file_extension(file.filename)
-            contents = await file.read()
-            file_size = len(contents)
+            file_hash, file_size = await ATSFunctions.hash_file(file)
+
+            # Identical files were already scored; skip parsing and Groq entirely
+            resume = await get_resume_by_hash(session, file_hash)
+            if resume is not None and resume.ats_score_json:
+                ats_score = orjson.loads(resume.ats_score_json)
+                return {"resume_id": resume.id, "ats_score": ats_score}
 
             text_content = await ATSFunctions.extract_text_from_file(
-                contents, file_extension
-            )
-            file_path = ATSFunctions.save_file(contents, file.filename)
-            resume = ATSFunctions.save_resume_to_db(
-                session, file.filename, file_size, file_path
+                file, file_extension
             )
+            if resume is None:
+                file_path = await ATSFunctions.save_file(
+                    file, file_hash, file_extension
+                )
+                resume = await ATSFunctions.save_resume_to_db(
+                    session, file.filename, file_size, file_path, file_hash
+                )
 
             ats_score = await ATSFunctions.check_ats_score(text_content)
+            await ATSFunctions.save_ats_score(session, resume, ats_score)
             return {"resume_id": resume.id, "ats_score": ats_score}
         except HTTPException as he:
             raise he
@@ -97,57 +202,48 @@ class ATSFunctions:
                 status_code=500, detail=f"Error processing file: {str(e)}"
             )
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_token_encoding() -> tiktoken.Encoding:
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+
+    @staticmethod
+    def compress_resume(text_content: str) -> str:
+        """Normalize whitespace, drop control characters and cap the token count"""
+        text_content = "".join(
+            ch for ch in text_content if ch.isprintable() or ch.isspace()
+        )
+        text_content = WHITESPACE_RE.sub(" ", text_content).strip()
+
+        encoding = ATSFunctions.get_token_encoding()
+        # Resume text is data, so special-token markers are encoded as plain text
+        tokens = encoding.encode(text_content, disallowed_special=())
+        if len(tokens) <= RESUME_MAX_TOKENS:
+            return text_content
+        return encoding.decode(tokens[:RESUME_MAX_TOKENS])
+
     @staticmethod
     def create_ats_prompt(text_content: str) -> dict:
-        system_prompt = """You are an expert ATS (Applicant Tracking System) analyzer. Your task is to:
-            1. Analyze the given resume
-            2. Provide a score from 0-100
-            3. Give brief feedback
-            4. List specific improvements
-            5. Add predicted job fit based on the resume with percentage of getting selected
-            Format your response exactly as a JSON object:
-            {
-                "ats_score": <number between 0-100>,
-                "feedback": "<single sentence summary>",
-                "improvements": ["point 1", "point 2", "point 3"],
-                "job_fit": {
-                    "job_title": "<most suitable job title>",
-                    "fit_percentage": <number between 0-100>
-                }
-            }"""
-        user_prompt = f"Analyze this resume:\n{text_content}"
-        return {
-            "model": "mixtral-8x7b-32768",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            "temperature": 0.7,
-            "max_tokens": 1000,
-            "response_format": {"type": "json_object"},  
-        }
+        user_msg = {"role": "user", "content": f"Analyze this resume:\n{text_content}"}
+        return {**BASE_PAYLOAD, "messages": [SYSTEM_MSG, user_msg]}
 
     @staticmethod
+    @retry_with_backoff_async(
+        retries=2, backoff_in_seconds=0.5, exceptions=(httpx.TransportError,)
+    )
     async def call_groq_api(payload: dict) -> dict:
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "Authorization": f"Bearer {os.getenv('GROQ_API_KEY')}",
-                "Content-Type": "application/json",
-            }
-
-            response = await client.post(
-                os.getenv("GROQ_API_URL"), json=payload, headers=headers
-            )
-            response.raise_for_status()
-            return response.json()
+        # Not streamed: Groq's JSON mode (response_format) has been documented as
+        # unsupported with stream=True, and scoring depends on JSON mode
+        client = get_http_client()
+        response = await client.post(GROQ_API_URL, content=orjson.dumps(payload))
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
     @staticmethod
     def parse_api_response(result: dict) -> dict:
         try:
             response_content = result["choices"][0]["message"]["content"]
-            import json
-
-            parsed_response = json.loads(response_content.strip())
+            parsed_response = orjson.loads(response_content)
 
             required_keys = ["ats_score", "feedback", "improvements"]
             if not all(key in parsed_response for key in required_keys):
@@ -158,15 +254,40 @@ class ATSFunctions:
             )
 
             return parsed_response
-        except (KeyError, json.JSONDecodeError, ValueError) as e:
+        except (KeyError, orjson.JSONDecodeError, ValueError) as e:
             raise Exception(f"Invalid API response format: {str(e)}")
 
     @staticmethod
     async def check_ats_score(text_content: str) -> dict:
         try:
+            text_content = ATSFunctions.compress_resume(text_content)
             payload = ATSFunctions.create_ats_prompt(text_content)
+
+            cache_key = None
+            if llm_cache.should_cache(payload):
+                cache_key = LLMCache.make_key(payload)
+                cached_response = await llm_cache.get(cache_key)
+                if cached_response is not None:
+                    return cached_response
+
+            embedding = None
+            if semantic_cache.loaded:
+                embedding = await semantic_cache.embed(text_content)
+                if embedding is not None:
+                    cached_response = await semantic_cache.get(embedding)
+                    if cached_response is not None:
+                        if cache_key is not None:
+                            await llm_cache.set(cache_key, cached_response)
+                        return cached_response
+
             result = await ATSFunctions.call_groq_api(payload)
-            return ATSFunctions.parse_api_response(result)
+            parsed_response = ATSFunctions.parse_api_response(result)
+
+            if cache_key is not None:
+                await llm_cache.set(cache_key, parsed_response)
+            if embedding is not None:
+                await semantic_cache.set(embedding, parsed_response)
+            return parsed_response
         except httpx.RequestError as e:
             raise HTTPException(
                 status_code=500,
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from sqlmodel import Session, select
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.atsChecker.atsChecker import ATSFunctions
 from database.db import get_session
 from database.dbModels import Resume
+from app.atsChecker.resume_cache import (
+    resume_cache,
+    resume_cache_lock,
+    resume_list_cache,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,12 +17,23 @@ ats_functions = ATSFunctions()
 
 
 @ats_router.get("/resumes/")
-def list_resumes(session: Session = Depends(get_session)):
-    """List all resumes"""
+async def list_resumes(
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    """List resumes, one page at a time"""
     try:
-        query = select(Resume)
-        result = session.execute(query)
-        resumes = result.scalars().all()
+        with resume_cache_lock:
+            resumes = resume_list_cache.get((limit, offset))
+        if resumes is not None:
+            return resumes
+
+        query = select(Resume).order_by(Resume.id).limit(limit).offset(offset)
+        result = await session.exec(query)
+        resumes = result.all()
+        with resume_cache_lock:
+            resume_list_cache[(limit, offset)] = resumes
         return resumes
     except Exception as e:
         logger.error(f"Error fetching resumes: {e}")
@@ -24,11 +41,18 @@ def list_resumes(session: Session = Depends(get_session)):
 
 
 @ats_router.get("/resumes/{resume_id}")
-def get_resume(resume_id: int, session: Session = Depends(get_session)):
+async def get_resume(resume_id: int, session: AsyncSession = Depends(get_session)):
     try:
-        resume = session.get(Resume, resume_id)
+        with resume_cache_lock:
+            resume = resume_cache.get(resume_id)
+        if resume is not None:
+            return resume
+
+        resume = await session.get(Resume, resume_id)
         if resume is None:
             raise HTTPException(status_code=404, detail="Resume not found")
+        with resume_cache_lock:
+            resume_cache[resume_id] = resume
         return resume
     except Exception as e:
         logger.error(f"Error fetching resume {resume_id}: {e}")
@@ -37,7 +61,7 @@ def get_resume(resume_id: int, session: Session = Depends(get_session)):
 
 @ats_router.post("/upload_resume/")
 async def upload_resume(
-    file: UploadFile = File(...), session: Session = Depends(get_session)
+    file: UploadFile = File(...), session: AsyncSession = Depends(get_session)
 ):
     try:
         ats_score = await ats_functions.upload_resume(file, session)
@@ -0,0 +1,41 @@
+import os
+import httpx
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Read once at import so a missing setting fails at startup, not on the first upload
+GROQ_API_URL = os.getenv("GROQ_API_URL")
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+if not GROQ_API_URL or not GROQ_API_KEY:
+    raise ValueError("GROQ_API_URL and GROQ_API_KEY environment variables must be set")
+
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", 30))
+AUTH_HEADERS = {
+    "Authorization": f"Bearer {GROQ_API_KEY}",
+    "Content-Type": "application/json",
+}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared Groq client; created on first use if startup has not run"""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+            headers=AUTH_HEADERS,
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and its connection pool"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
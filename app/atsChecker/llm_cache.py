@@ -0,0 +1,241 @@
+import os
+import time
+import asyncio
+import threading
+import hashlib
+import logging
+import orjson
+from typing import Optional, Protocol
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 86400))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 1024))
+
+# Independent of LLM_CACHE_FORCE: near-duplicate hits are served at any temperature
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_CACHE_MODEL = os.getenv(
+    "SEMANTIC_CACHE_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+)
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1024))
+# Words per embedded window, kept under the model's 256 word-piece input limit
+SEMANTIC_CACHE_CHUNK_WORDS = int(os.getenv("SEMANTIC_CACHE_CHUNK_WORDS", 180))
+SEMANTIC_CACHE_CANDIDATES = 5
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[dict]: ...
+
+    async def set(self, key: str, value: dict, ttl: int) -> None: ...
+
+
+class InMemoryBackend:
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._store = {}
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            self._store.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: dict, ttl: int) -> None:
+        if key not in self._store and len(self._store) >= self.max_entries:
+            # Dicts keep insertion order, so the first key is the oldest entry
+            self._store.pop(next(iter(self._store)))
+        self._store[key] = (time.monotonic() + ttl, value)
+
+
+class RedisBackend:
+    def __init__(self, url: str, prefix: str = "ats:llm:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(self.prefix + key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: dict, ttl: int) -> None:
+        await self._client.set(self.prefix + key, orjson.dumps(value), ex=ttl)
+
+
+class LLMCache:
+    def __init__(self, backend: CacheBackend, force_cache: bool = False):
+        self.backend = backend
+        self.force_cache = force_cache
+
+    @staticmethod
+    def make_key(payload: dict) -> str:
+        """Hash the parts of the payload that determine the model output"""
+        key_source = orjson.dumps(
+            {"m": payload["model"], "msgs": payload["messages"]},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(key_source).hexdigest()
+
+    def should_cache(self, payload: dict) -> bool:
+        """Sampled responses are only cached when force-cache is enabled"""
+        return self.force_cache or payload.get("temperature", 0) == 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    async def set(self, key: str, value: dict, ttl: int = LLM_CACHE_TTL) -> None:
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache store failed: {e}")
+
+
+class SemanticCache:
+    """Near-duplicate lookup over resume embeddings, used after an exact-cache miss"""
+
+    def __init__(
+        self,
+        model_name: str = SEMANTIC_CACHE_MODEL,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: int = LLM_CACHE_TTL,
+        chunk_words: int = SEMANTIC_CACHE_CHUNK_WORDS,
+    ):
+        self.model_name = model_name
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.chunk_words = chunk_words
+        self._np = None
+        self._model = None
+        self._index = None
+        # id -> (expires_at, chunk embeddings, response); insertion order is expiry order
+        self._entries = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self):
+        """Load the embedding model and create an empty inner-product index"""
+        if self.loaded:
+            return
+        import faiss
+        import numpy
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name)
+        dimension = model.get_sentence_embedding_dimension()
+        self._index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+        self._np = numpy
+        self._model = model
+
+    def _embed(self, text: str):
+        # The model reads only its first 256 word pieces, so the resume is embedded
+        # in word windows that each fit; a hit has to match on every window
+        words = text.split()
+        chunks = [
+            " ".join(words[i : i + self.chunk_words])
+            for i in range(0, len(words), self.chunk_words)
+        ] or [""]
+        # Normalized vectors make inner product equal to cosine similarity
+        vectors = self._model.encode(
+            chunks, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return vectors.astype("float32")
+
+    @staticmethod
+    def _centroid(chunk_vectors):
+        centroid = chunk_vectors.mean(axis=0, keepdims=True)
+        return centroid / max(float((centroid * centroid).sum()) ** 0.5, 1e-12)
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones until there is room for one more"""
+        stale = []
+        for entry_id, (expires_at, _, _) in self._entries.items():
+            if expires_at > now and len(self._entries) - len(stale) < self.max_entries:
+                break
+            stale.append(entry_id)
+        if stale:
+            for entry_id in stale:
+                del self._entries[entry_id]
+            self._index.remove_ids(self._np.array(stale, dtype="int64"))
+
+    def _search(self, chunk_vectors) -> Optional[dict]:
+        with self._lock:
+            if self._index.ntotal == 0:
+                return None
+            now = time.monotonic()
+            k = min(SEMANTIC_CACHE_CANDIDATES, self._index.ntotal)
+            # The centroid only shortlists candidates; each is then checked window
+            # by window so a changed section cannot hide behind an unchanged header
+            _, ids = self._index.search(self._centroid(chunk_vectors), k)
+            for entry_id in ids[0]:
+                entry = self._entries.get(int(entry_id))
+                if entry is None:
+                    continue
+                expires_at, cached_vectors, response = entry
+                if expires_at <= now or len(cached_vectors) != len(chunk_vectors):
+                    continue
+                similarities = (cached_vectors * chunk_vectors).sum(axis=1)
+                if float(similarities.min()) >= self.threshold:
+                    return response
+        return None
+
+    def _add(self, chunk_vectors, response: dict):
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(
+                self._centroid(chunk_vectors),
+                self._np.array([entry_id], dtype="int64"),
+            )
+            self._entries[entry_id] = (now + self.ttl, chunk_vectors, response)
+
+    async def embed(self, text: str):
+        try:
+            return await asyncio.to_thread(self._embed, text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+
+    async def get(self, embedding) -> Optional[dict]:
+        try:
+            return await asyncio.to_thread(self._search, embedding)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return None
+
+    async def set(self, embedding, response: dict) -> None:
+        try:
+            await asyncio.to_thread(self._add, embedding, response)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+
+
+def create_llm_cache() -> LLMCache:
+    """Use Redis when REDIS_URL is set, otherwise an in-process dict"""
+    redis_url = os.getenv("REDIS_URL")
+    backend = RedisBackend(redis_url) if redis_url else InMemoryBackend()
+    force_cache = os.getenv("LLM_CACHE_FORCE", "0") == "1"
+    return LLMCache(backend, force_cache=force_cache)
+
+
+llm_cache = create_llm_cache()
+semantic_cache = SemanticCache()
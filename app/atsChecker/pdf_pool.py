@@ -0,0 +1,83 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from dotenv import load_dotenv
+from app.pdfParser.pdfParser import extract_pdf_text, warm_up
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Each worker holds a full interpreter plus MuPDF, so the pool is capped. The cap
+# is per host and split between the WEB_CONCURRENCY uvicorn workers.
+PDF_POOL_MAX_WORKERS = int(os.getenv("PDF_POOL_MAX_WORKERS", 4))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _start_method() -> str:
+    # By startup the app already runs threads and holds sockets, which a forked
+    # child would inherit; forkserver and spawn start workers from a clean process
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return "forkserver"
+    return "spawn"
+
+
+def _log_warm_up_failure(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"PDF worker failed to start: {future.exception()!r}")
+
+
+def start_pdf_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        host_workers = min(os.cpu_count() or 2, PDF_POOL_MAX_WORKERS)
+        max_workers = max(1, host_workers // max(1, WEB_CONCURRENCY))
+        mp_context = multiprocessing.get_context(_start_method())
+        if mp_context.get_start_method() == "forkserver":
+            # Workers are forked from the server process, so MuPDF is loaded there
+            # once instead of in every worker
+            mp_context.set_forkserver_preload(["app.pdfParser.pdfParser"])
+        _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+        # Workers start on demand; one task each starts them now instead of on uploads
+        for _ in range(max_workers):
+            _pool.submit(warm_up).add_done_callback(_log_warm_up_failure)
+    return _pool
+
+
+def _replace_broken_pool(broken_pool: ProcessPoolExecutor):
+    global _pool
+    # Concurrent tasks fail together; only the first one to get here rebuilds
+    if _pool is broken_pool:
+        logger.warning("PDF worker pool is broken, starting a new one")
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        start_pdf_pool()
+
+
+def close_pdf_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def extract_pdf_text_async(contents: bytes) -> str:
+    """Parse in the process pool, or in a thread when the pool is not started"""
+    if _pool is None:
+        return await asyncio.to_thread(extract_pdf_text, contents)
+    loop = asyncio.get_running_loop()
+    pool = _pool
+    try:
+        return await loop.run_in_executor(pool, extract_pdf_text, contents)
+    except BrokenProcessPool as e:
+        # A worker died, most likely MuPDF crashing on a malformed file. Later
+        # uploads get a fresh pool, but this file is not retried: it would
+        # probably crash the new pool too, along with whatever else runs on it
+        _replace_broken_pool(pool)
+        raise RuntimeError("PDF parser crashed while reading this file") from e
@@ -0,0 +1,14 @@
+import threading
+from cachetools import TTLCache
+
+# Resume rows change only on upload, so reads are served from a short TTL cache
+resume_cache = TTLCache(maxsize=1024, ttl=60)
+resume_list_cache = TTLCache(maxsize=64, ttl=60)
+resume_cache_lock = threading.RLock()
+
+
+def invalidate_resume(resume_id: int):
+    """Drop cached pages and the row's entry after a resume is inserted or updated"""
+    with resume_cache_lock:
+        resume_list_cache.clear()
+        resume_cache.pop(resume_id, None)
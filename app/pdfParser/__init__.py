@@ -0,0 +1 @@
+from .pdfParser import *
@@ -0,0 +1,40 @@
+import os
+import pymupdf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Runs inside the PDF pool workers, so it must not import the web app: unpickling
+# a function imports its package, and app.atsChecker pulls in FastAPI, the DB
+# engine and the Groq settings
+
+# Set to 0 to always run text extraction, even on pages that look text-free
+PDF_SKIP_TEXTLESS_PAGES = os.getenv("PDF_SKIP_TEXTLESS_PAGES", "1") == "1"
+
+
+def _is_textless(doc: pymupdf.Document, page: pymupdf.Page) -> bool:
+    """True when neither the page content nor any annotation can draw text"""
+    # Form fields and annotations carry their own fonts in appearance streams,
+    # so they have to be checked separately from the page's font resources
+    if page.first_annot is not None or page.first_widget is not None:
+        return False
+    return not doc.get_page_fonts(page.number)
+
+
+def extract_pdf_text(contents: bytes) -> str:
+    """Parse a PDF to text; module-level so pool workers can unpickle it"""
+    with pymupdf.open(stream=contents, filetype="pdf") as doc:
+        parts = []
+        for page in doc:
+            if PDF_SKIP_TEXTLESS_PAGES and _is_textless(doc, page):
+                parts.append("")
+                continue
+            parts.append(page.get_text("text") or "")
+    return "\n".join(parts)
+
+
+def warm_up() -> str:
+    """Parse a one-page PDF so MuPDF is loaded before the first real upload"""
+    doc = pymupdf.open()
+    doc.new_page()
+    return extract_pdf_text(doc.tobytes())
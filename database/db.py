@@ -1,11 +1,15 @@
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 from dotenv import load_dotenv
 import time
+import asyncio
+import threading
 from functools import wraps
 import logging
 from sqlalchemy.exc import OperationalError, TimeoutError
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from contextlib import asynccontextmanager
 from sqlalchemy import text
 
 # Load environment variables
@@ -20,6 +24,12 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Plain postgres URLs resolve to psycopg2; the async engine needs asyncpg
+for _prefix in ("postgres://", "postgresql://", "postgresql+psycopg2://"):
+    if DATABASE_URL.startswith(_prefix):
+        DATABASE_URL = "postgresql+asyncpg://" + DATABASE_URL[len(_prefix) :]
+        break
+
 
 def retry_with_backoff(retries=3, backoff_in_seconds=1):
     """
@@ -57,6 +67,47 @@ def retry_with_backoff(retries=3, backoff_in_seconds=1):
     return decorator
 
 
+def retry_with_backoff_async(
+    retries=3,
+    backoff_in_seconds=1,
+    exceptions=(OperationalError, TimeoutError, ConnectionError),
+):
+    """
+    Async variant of retry_with_backoff that waits with asyncio.sleep.
+
+    Args:
+        retries: Maximum number of retries
+        backoff_in_seconds: Initial backoff time, doubles with each retry
+        exceptions: Exception types that trigger a retry
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            attempts = 0
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except exceptions as e:
+                    attempts += 1
+                    if attempts > retries:
+                        logger.error(
+                            f"Maximum retries ({retries}) reached. Last error: {e}"
+                        )
+                        raise
+
+                    sleep_time = backoff_in_seconds * (2 ** (attempts - 1))
+                    logger.warning(
+                        f"{func.__name__} attempt {attempts} failed: {str(e)}. "
+                        f"Retrying in {sleep_time} seconds..."
+                    )
+                    await asyncio.sleep(sleep_time)
+
+        return wrapper
+
+    return decorator
+
+
 # Circuit breaker implementation
 class CircuitBreaker:
     def __init__(self, max_failures=5, reset_interval=300):
@@ -64,78 +115,88 @@ class CircuitBreaker:
         self.reset_interval = reset_interval
         self.failure_count = 0
         self.reset_time = None
+        self._lock = threading.Lock()
 
     def is_open(self):
-        """Check if circuit is open (too many failures)"""
-        if self.reset_time is not None:
-            if time.time() < self.reset_time:
-                return True
-            # Reset after interval
-            self.reset_time = None
-            self.failure_count = 0
-        return False
+        """Check if circuit is open (too many failures) without taking the lock"""
+        reset_time = self.reset_time
+        return reset_time is not None and time.monotonic() < reset_time
 
     def record_success(self):
         """Record a successful operation"""
-        self.failure_count = 0
-        self.reset_time = None
+        with self._lock:
+            self.failure_count = 0
+            self.reset_time = None
 
     def record_failure(self):
         """Record a failed operation"""
-        self.failure_count += 1
-        if self.failure_count >= self.max_failures:
-            self.reset_time = time.time() + self.reset_interval
+        with self._lock:
+            if self.reset_time is not None and time.monotonic() >= self.reset_time:
+                # Reset after interval
+                self.reset_time = None
+                self.failure_count = 0
+            self.failure_count += 1
+            opened = self.failure_count >= self.max_failures
+            if opened:
+                self.reset_time = time.monotonic() + self.reset_interval
+        if opened:
             logger.error(f"Circuit breaker opened for {self.reset_interval} seconds")
-            return True
-        return False
+        return opened
+
+    # The lock only guards a few assignments, so it is safe to take on the event loop
+    async def arecord_success(self):
+        """Record a successful operation from a coroutine"""
+        self.record_success()
+
+    async def arecord_failure(self):
+        """Record a failed operation from a coroutine"""
+        return self.record_failure()
 
 
 # Create circuit breaker instance
 circuit_breaker = CircuitBreaker()
 
 
-@retry_with_backoff(retries=5, backoff_in_seconds=1)
 def create_db_engine():
-    """Create SQLAlchemy engine with retry capability"""
-    # Check if circuit breaker is open
-    if circuit_breaker.is_open():
-        raise Exception("Circuit breaker is open. Database connection not attempted.")
-
-    try:
-        engine = create_engine(
-            DATABASE_URL,
-            echo=True,
-            pool_size=5,
-            max_overflow=10,
-            pool_timeout=30,
-            pool_recycle=1800,
-            pool_pre_ping=True,
-            connect_args={"connect_timeout": 10},
-        )
-
-        # Test connection using proper SQLAlchemy syntax
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1")).fetchone()
-
-        circuit_breaker.record_success()
-        logger.info("Database engine created successfully")
-        return engine
-
-    except Exception as e:
-        circuit_breaker.record_failure()
-        raise
-
-
-try:
-    engine = create_db_engine()
-except Exception as e:
-    logger.critical(f"Failed to create database engine: {e}")
-    raise
-
-
-@retry_with_backoff(retries=3)
-def init_db():
-    """Initialize database schema"""
+    """Create the async SQLAlchemy engine; connections are opened lazily"""
+    connect_args = {"timeout": 10}
+    if DATABASE_URL.startswith("postgresql+asyncpg://"):
+        # JIT compilation only adds warm-up cost to the app's small lookups
+        connect_args["server_settings"] = {"jit": "off"}
+
+    return create_async_engine(
+        DATABASE_URL,
+        echo=os.getenv("SQL_ECHO", "0") == "1",
+        future=True,
+        query_cache_size=1200,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+
+
+# create_all does not alter existing tables, so columns added after the first
+# deploy are applied here; every statement is idempotent
+POSTGRES_MIGRATIONS = [
+    "ALTER TABLE resume ADD COLUMN IF NOT EXISTS file_hash VARCHAR",
+    "ALTER TABLE resume ADD COLUMN IF NOT EXISTS ats_score_json VARCHAR",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_resume_file_hash ON resume (file_hash)",
+]
+
+# Every uvicorn worker runs init_db at startup; this advisory lock makes them apply
+# the schema one at a time instead of racing on concurrent DDL
+SCHEMA_LOCK_ID = 0x41545343  # "ATSC"
+
+engine = create_db_engine()
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@retry_with_backoff_async(retries=5)
+async def init_db():
+    """Check connectivity and initialize database schema"""
     if circuit_breaker.is_open():
         raise Exception(
             "Circuit breaker is open. Database initialization not attempted."
@@ -143,29 +204,51 @@ def init_db():
 
     try:
         logger.info("Initializing database...")
-        SQLModel.metadata.create_all(engine)
-        circuit_breaker.record_success()
+        async with engine.begin() as conn:
+            await conn.execute(text("SELECT 1"))
+            is_postgres = engine.dialect.name == "postgresql"
+            if is_postgres:
+                # Transaction-scoped, so it is released when this block commits
+                await conn.execute(
+                    text("SELECT pg_advisory_xact_lock(:lock_id)"),
+                    {"lock_id": SCHEMA_LOCK_ID},
+                )
+            await conn.run_sync(SQLModel.metadata.create_all)
+            if is_postgres:
+                for statement in POSTGRES_MIGRATIONS:
+                    await conn.execute(text(statement))
+        await circuit_breaker.arecord_success()
         logger.info("Database initialized successfully!")
     except Exception as e:
-        circuit_breaker.record_failure()
+        await circuit_breaker.arecord_failure()
         raise
 
 
-def get_session():
+@asynccontextmanager
+async def session_scope():
+    """Async session for use outside of request handlers"""
+    async with async_session() as session:
+        yield session
+
+
+async def get_session():
     """Database session dependency"""
-    session = Session(engine)
-    try:
+    async with async_session() as session:
         yield session
-    finally:
-        session.close()
 
 
 if __name__ == "__main__":
-    init_db()
 
-    try:
-        with get_session() as session:
-            result = session.execute(text("SELECT 1")).fetchone()
-            logger.info(f"Database query result: {result}")
-    except Exception as e:
-        logger.error(f"Error using database: {e}")
+    async def main():
+        await init_db()
+
+        try:
+            async with session_scope() as session:
+                result = (await session.execute(text("SELECT 1"))).fetchone()
+                logger.info(f"Database query result: {result}")
+        except Exception as e:
+            logger.error(f"Error using database: {e}")
+        finally:
+            await engine.dispose()
+
+    asyncio.run(main())
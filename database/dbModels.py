@@ -1,3 +1,4 @@
+from typing import Optional
 from sqlmodel import Field, SQLModel
 
 
@@ -5,4 +6,6 @@ class Resume(SQLModel, table=True):
     id: int = Field(default=None, primary_key=True)
     filename: str
     file_size: int
-    file_url: str = None
\ No newline at end of file
+    file_url: str = None
+    file_hash: Optional[str] = Field(default=None, index=True, unique=True)
+    ats_score_json: Optional[str] = None
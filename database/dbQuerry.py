@@ -0,0 +1,13 @@
+from typing import Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database.dbModels import Resume
+
+
+async def get_resume_by_hash(
+    session: AsyncSession, file_hash: str
+) -> Optional[Resume]:
+    """Return the resume stored for this content hash, if any"""
+    query = select(Resume).where(Resume.file_hash == file_hash).limit(1)
+    result = await session.exec(query)
+    return result.first()
@@ -1,24 +1,56 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
+import os
+import asyncio
+import anyio.to_thread
+from concurrent.futures import ThreadPoolExecutor
+from app.atsChecker.atsChecker import ATSFunctions
 from app.atsChecker.atsCheckerApi import ats_router
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
+from app.atsChecker.http import get_http_client, close_http_client
+from app.atsChecker.pdf_pool import start_pdf_pool, close_pdf_pool
+from app.atsChecker.llm_cache import SEMANTIC_CACHE_ENABLED, semantic_cache
 from database.db import init_db
 
-app = FastAPI()
+# Worker threads for asyncio.to_thread calls and for anyio-run sync code
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", 32))
+
+# Uploads up to this size stay in memory; larger ones spool to a temp file
+MultiPartParser.spool_max_size = int(
+    os.getenv("UPLOAD_SPOOL_MAX_SIZE", 4 * 1024 * 1024)
+)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.include_router(ats_router)
 
 
 @app.on_event("startup")
 async def startup():
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=THREADPOOL_SIZE)
+    )
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     print("Initializing database...")
-    init_db()
+    await init_db()
+    get_http_client()
+    # tiktoken downloads the BPE file on first use; fail at boot, not on an upload
+    print("Loading tokenizer...")
+    ATSFunctions.get_token_encoding()
+    start_pdf_pool()
+    if SEMANTIC_CACHE_ENABLED:
+        print("Loading semantic cache model...")
+        semantic_cache.load()
     print("App has started!")
 
 
 @app.on_event("shutdown")
 async def shutdown():
     print("App is shutting down!")
+    await close_http_client()
+    close_pdf_pool()
 
 
 origins = [
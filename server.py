@@ -1,13 +1,24 @@
-import uvicorn, os, dotenv
+import uvicorn, os, sys, dotenv
 
 dotenv.load_dotenv()
 
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8008))
 APP_ENV = os.getenv("APP_ENV", "prod")
+# Exported so every worker process sees the same value (used to size its PDF pool)
+os.environ.setdefault("WEB_CONCURRENCY", "2")
+WEB_CONCURRENCY = int(os.environ["WEB_CONCURRENCY"])
+# uvloop has no Windows build; fall back to the stdlib loop there
+LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
 
 if __name__ == "__main__":
     print(f"APP_ENV -> {APP_ENV} | PORT -> {PORT} | HOST -> {HOST}")
     uvicorn.run(
-        "main:app", host=HOST, port=PORT, reload=True if APP_ENV == "dev" else False
+        "main:app",
+        host=HOST,
+        port=PORT,
+        loop=LOOP,
+        http="httptools",
+        workers=WEB_CONCURRENCY,
+        reload=True if APP_ENV == "dev" else False,
     )